@@ -12,7 +12,7 @@ Features:
 
 Usage:
 1. Edit the CONFIG section below with your notification settings.
-2. Install dependencies: pip install requests feedparser beautifulsoup4
+2. Install dependencies: pip install requests feedparser aiohttp "lxml>=5" beautifulsoup4
 3. Run: python job_agent.py
 4. To run continuously, install as cron or systemd timer (example in comments).
 
@@ -20,15 +20,28 @@ Note: This script doesn't bypass any site's anti-scraping rules. If you need
 heavy usage, check each site's terms and prefer official APIs where available.
 """
 
-import requests
-import feedparser
+import asyncio
+from lxml import etree
+import io
 import time
-import smtplib
-from email.mime.text import MIMEText
-from email.header import Header
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 import hashlib
+import json
 import os
+import threading
+from functools import lru_cache
+
+try:
+    import hyperscan  # optional: SIMD multi-pattern matching for feed batches
+except ImportError:
+    hyperscan = None
+
+try:
+    import orjson  # optional: much faster decoding of the large RemoteOK payload
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 # ========================= CONFIG ==========================
 DB_PATH = "jobs_seen.db"  # DB support left in file but disabled by default
@@ -53,9 +66,15 @@ CUSTOM_FEEDS = [
     'https://remote4me.com/remote-dev-jobs/rss/',
 ]
 
+# Indeed RSS search (only used when SOURCES['indeed_rss'] is enabled)
+_INDEED_FEED = "https://www.indeed.com/rss?q=python+django"
+
 # Notification via Telegram (recommended)
 TELEGRAM_BOT_TOKEN = ""  # put your bot token here
 TELEGRAM_CHAT_ID = ""    # chat id to send messages to
+TELEGRAM_MAX_CHARS = 3500  # split messages well below Telegram's 4096-char limit
+TELEGRAM_SEND_INTERVAL = 1.0  # seconds between messages; Telegram allows ~1/s per chat
+TELEGRAM_MAX_RETRIES = 3  # retries per message after 429 Too Many Requests
 
 # Notification via email (fallback)
 SMTP_HOST = "smtp.gmail.com"
@@ -65,11 +84,56 @@ SMTP_PASS = ""
 EMAIL_TO = ""
 EMAIL_FROM = SMTP_USER
 
+# Fetching behaviour
+FEED_CONCURRENCY = 8  # max feeds fetched at the same time
+FEED_FETCH_MODE = "async"  # "async" (aiohttp) or "threads" (requests + thread pool)
+# ETag / Last-Modified cache so unchanged feeds come back as a bodyless 304
+FEED_CACHE_PATH = os.path.expanduser("~/.cache/job_agent/feeds.json")
+
 # Matching behaviour
 MIN_KEYWORD_MATCH = 1  # number of keywords that must match (1 means any)
 USER_AGENT = "JobWatcherBot/1.0 (+https://example.com)"
 # ===========================================================
 
+# KEYWORDS never change at runtime, so lowercase them once at import.
+_KEYWORDS_LC = tuple(k.lower() for k in KEYWORDS)
+
+
+# (original, lowercased) pairs so keywords_match reports the keyword as configured
+_KEYWORD_PAIRS = tuple(zip(KEYWORDS, _KEYWORDS_LC))
+
+# The feeds we watch are UTF-8; telling feedparser so skips its charset sniffing.
+_DEFAULT_FEED_CONTENT_TYPE = "application/rss+xml; charset=utf-8"
+
+
+# Heavier modules (aiohttp, requests, feedparser, smtplib/email) are imported
+# inside the functions that need them, so a cron run only pays for the paths
+# it uses.
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()  # the thread-pool fetcher may ask for it from 8 threads at once
+
+
+def _get_session():
+    """One pooled HTTP session for the blocking fetchers so repeated calls reuse
+    the TCP/TLS connection instead of re-handshaking every time.
+    """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            session = requests.Session()
+            session.headers.update({"User-Agent": USER_AGENT})
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16,
+                                  max_retries=Retry(total=2, backoff_factor=0.3))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _SESSION = session
+    return _SESSION
+
 
 # init_db DISABLED (not saving to DB by default)
 def init_db(path: str = DB_PATH):
@@ -80,7 +144,8 @@ def init_db(path: str = DB_PATH):
 
 
 def make_id(text: str) -> str:
-    return hashlib.sha1((text or "").encode('utf-8')).hexdigest()
+    # Only a dedupe key, so a short non-SHA digest is plenty (16 hex chars)
+    return hashlib.blake2b((text or "").encode('utf-8'), digest_size=8).hexdigest()
 
 
 # seen_contains DISABLED — always treat as new (returns False)
@@ -95,120 +160,471 @@ def mark_seen(conn, _id: str, title: str, link: str, source: str):
     pass
 
 
+def _keyword_pairs(keywords: List[str]) -> Tuple[Tuple[str, str], ...]:
+    """(keyword, lowercased keyword) pairs, precomputed for KEYWORDS."""
+    if keywords is KEYWORDS:
+        return _KEYWORD_PAIRS
+    return tuple((k, k.lower()) for k in keywords)
+
+
+@lru_cache(maxsize=None)
+def _hyperscan_db(keywords_lc: Tuple[str, ...]):
+    # Each keyword is compiled as an exact byte literal and matched against the
+    # already-lowercased text, so hits are the same as `k in text.lower()`
+    expressions = ["".join(f"\\x{b:02x}" for b in k.encode('utf-8', 'surrogatepass')).encode()
+                   for k in keywords_lc]
+    db = hyperscan.Database()
+    db.compile(
+        expressions=expressions,
+        ids=list(range(len(keywords_lc))),
+        elements=len(keywords_lc),
+        flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(keywords_lc),
+    )
+    return db
+
+
+# Hyperscan scratch space serves one scan at a time, so each thread (e.g. the
+# thread-pool feed fetcher) keeps its own per database
+_HS_LOCAL = threading.local()
+
+
+def _hyperscan_scratch(keywords_lc: Tuple[str, ...], db):
+    scratches = getattr(_HS_LOCAL, 'scratches', None)
+    if scratches is None:
+        scratches = _HS_LOCAL.scratches = {}
+    cached = scratches.get(keywords_lc)
+    if cached is None or cached[0] is not db:
+        cached = scratches[keywords_lc] = (db, hyperscan.Scratch(db))
+    return cached[1]
+
+
+def scan_many(texts: List[str], keywords: List[str], min_match: int = MIN_KEYWORD_MATCH) -> List[List[str]]:
+    """keywords_match() for a whole batch of texts, e.g. every entry of a feed.
+
+    Uses a compiled Hyperscan database when the optional `hyperscan` package
+    is installed, otherwise falls back to keywords_match() per text. Both
+    paths return the same lists.
+    """
+    # Hyperscan cannot compile an empty pattern, so those lists use keywords_match()
+    if hyperscan is None or not keywords or not all(keywords):
+        return [keywords_match(t, keywords, min_match) for t in texts]
+
+    keywords_lc = _KEYWORDS_LC if keywords is KEYWORDS else tuple(k.lower() for k in keywords)
+    db = _hyperscan_db(keywords_lc)
+    scratch = _hyperscan_scratch(keywords_lc, db)
+
+    def on_match(idx, start, end, flags, hits):
+        hits.add(idx)
+
+    results = []
+    for text in texts:
+        hits = set()
+        text_l = text.lower() if text else ""
+        db.scan(text_l.encode('utf-8', 'surrogatepass'), match_event_handler=on_match,
+                context=hits, scratch=scratch)
+        # Report in keyword order, exactly like keywords_match()
+        found = [k for i, k in enumerate(keywords) if i in hits]
+        results.append(found if len(found) >= min_match else [])
+    return results
+
+
 def keywords_match(text: str, keywords: List[str], min_match: int = MIN_KEYWORD_MATCH) -> List[str]:
-    text_l = (text or "").lower()
-    found = [k for k in keywords if k.lower() in text_l]
+    text_l = text.lower() if text else ""
+    # Each `in` is a C-level substring search; checking every keyword on its
+    # own also reports keywords contained in longer ones, in keyword order
+    found = [k for k, k_lc in _keyword_pairs(keywords) if k_lc in text_l]
     return found if len(found) >= min_match else []
 
 
+# -------------------- Feed cache --------------------
+
+# Bump whenever parsing or matching changes what gets stored in `results`
+_FEED_CACHE_VERSION = 2
+
+def _load_feed_cache(path: str = FEED_CACHE_PATH) -> Dict:
+    try:
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_feed_cache(cache: Dict, path: str = FEED_CACHE_PATH):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(cache, fh)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Feed cache save failed: {e}")
+
+
+def _cached_feed(cache: Optional[Dict], feed_url: str, keywords: List[str]) -> Optional[Dict]:
+    """Return the cache entry for a feed, ignoring it if it was produced with
+    other keywords, another MIN_KEYWORD_MATCH or an older cache format.
+    """
+    if cache is None:
+        return None
+    entry = cache.get(feed_url)
+    if (entry and entry.get('version') == _FEED_CACHE_VERSION
+            and entry.get('keywords') == list(keywords)
+            and entry.get('min_match') == MIN_KEYWORD_MATCH):
+        return entry
+    return None
+
+
+def _not_modified_results(cache: Optional[Dict], feed_url: str, keywords: List[str], status: int) -> Optional[List[Dict]]:
+    """Return the cached results when the server answered 304, else None."""
+    entry = _cached_feed(cache, feed_url, keywords)
+    if status == 304 and entry:
+        return entry['results']
+    return None
+
+
+def _conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+    headers = {}
+    if entry:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def _parse_and_cache(cache: Optional[Dict], feed_url: str, keywords: List[str], headers, body: bytes) -> List[Dict]:
+    """Parse a fresh 200 body and remember its validators for the next run.
+
+    If the server ignored our validators but sent the same bytes again, the
+    cached results are reused and feedparser is skipped.
+    """
+    entry = _cached_feed(cache, feed_url, keywords)
+    body_hash = hashlib.blake2b(body, digest_size=8).hexdigest()
+    if entry and entry.get('body_hash') == body_hash:
+        results = entry['results']
+    else:
+        results = parse_feed_bytes(body, feed_url, keywords, headers.get('Content-Type'))
+    if cache is not None:
+        cache[feed_url] = {
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'body_hash': body_hash,
+            'version': _FEED_CACHE_VERSION,
+            'keywords': list(keywords),
+            'min_match': MIN_KEYWORD_MATCH,
+            'results': results,
+        }
+    return results
+
+
 # -------------------- Source fetchers --------------------
 
 def fetch_remoteok(keywords: List[str]) -> List[Dict]:
     """Fetch RemoteOK API and return job dicts containing title, link, id, description"""
     url = "https://remoteok.com/api"
-    headers = {"User-Agent": USER_AGENT}
     try:
-        r = requests.get(url, headers=headers, timeout=15)
+        r = _get_session().get(url, timeout=15)
         r.raise_for_status()
-        data = r.json()
-        results = []
+        data = _json_loads(r.content)
+        get = dict.get  # bound once; avoids an attribute lookup per field per item
+
+        def extract(item):
+            title = get(item, 'position') or get(item, 'title') or ''
+            description = get(item, 'description', '')
+            link = get(item, 'url') or get(item, 'apply_url') or ''
+            return title, link, description, f"{title} {get(item, 'company', '')} {description}"
+
         # RemoteOK returns a list of job dicts, with the first element often being metadata
-        for item in data:
-            if not isinstance(item, dict):
-                continue
-            if 'position' in item or 'title' in item:
-                title = item.get('position') or item.get('title') or ''
-                description = item.get('description', '')
-                company = item.get('company', '')
-                link = item.get('url') or item.get('apply_url') or ''
-                combined = f"{title} {company} {description}"
-                matches = keywords_match(combined, keywords)
-                if matches:
-                    results.append({
-                        'id': make_id(link or title),
-                        'title': title,
-                        'link': link,
-                        'description': description,
-                        'source': 'remoteok',
-                        'matches': matches,
-                    })
+        jobs = [extract(item) for item in data
+                if isinstance(item, dict) and ('position' in item or 'title' in item)]
+        all_matches = scan_many([combined for *_, combined in jobs], keywords)
+        results = [{
+            'id': make_id(link or title),
+            'title': title,
+            'link': link,
+            'description': description,
+            'source': 'remoteok',
+            'matches': matches,
+        } for (title, link, description, _), matches in zip(jobs, all_matches) if matches]
         return results
     except Exception as e:
         print(f"RemoteOK fetch error: {e}")
         return []
 
 
-def fetch_rss_feed(feed_url: str, keywords: List[str]) -> List[Dict]:
+_ATOM_NS = '{http://www.w3.org/2005/Atom}'
+_RSS1_NS = '{http://purl.org/rss/1.0/}'
+_CONTENT_NS = '{http://purl.org/rss/1.0/modules/content/}'
+
+
+def _child_text(el, *tags: str) -> str:
+    """Full text of the first listed child that has any (handles xhtml markup)."""
+    for tag in tags:
+        child = el.find(tag)
+        if child is not None:
+            text = "".join(child.itertext()).strip()
+            if text:
+                return text
+    return ''
+
+
+def _entry_link(el) -> str:
+    # A plain RSS <link>URL</link> wins over any atom:link the item also carries
+    link = _child_text(el, 'link', _RSS1_NS + 'link')
+    if link:
+        return link
+    for link_el in el.iterfind(_ATOM_NS + 'link'):
+        if link_el.get('rel', 'alternate') == 'alternate' and link_el.get('href'):
+            return link_el.get('href')
+    return ''
+
+
+def _lxml_entries(body: bytes) -> List[Tuple[str, str, str]]:
+    """Stream (title, link, summary) out of an RSS/Atom body with lxml.
+
+    Raises etree.XMLSyntaxError on malformed feeds so the caller can fall back
+    to feedparser's forgiving parser.
+    """
+    entries = []
+    # 'internal' expands entities declared in the feed's own DTD (as feedparser
+    # does) but never loads external ones (no XXE); a reference to an external
+    # entity raises XMLSyntaxError and goes to feedparser. Needs lxml >= 5
+    ctx = etree.iterparse(io.BytesIO(body), events=('end',), tag=('{*}item', '{*}entry'),
+                          resolve_entities='internal')
+    for _, el in ctx:
+        title = _child_text(el, 'title', _ATOM_NS + 'title', _RSS1_NS + 'title')
+        summary = _child_text(el, 'description', _RSS1_NS + 'description', _ATOM_NS + 'summary',
+                              _CONTENT_NS + 'encoded', _ATOM_NS + 'content')
+        entries.append((title, _entry_link(el), summary))
+        # Free parsed entries as we go so large feeds stay small in memory
+        el.clear()
+        while el.getprevious() is not None:
+            del el.getparent()[0]
+    return entries
+
+
+def _feedparser_entries(body: bytes, content_type: Optional[str] = None) -> List[Tuple[str, str, str]]:
+    import feedparser
+    # Trust the server's charset when it sent one, otherwise assume UTF-8
+    if not content_type or 'charset=' not in content_type.lower():
+        content_type = _DEFAULT_FEED_CONTENT_TYPE
+    # Relative URI resolution is HTML cleanup this script never uses
+    feed = feedparser.parse(body, response_headers={'content-type': content_type},
+                            resolve_relative_uris=False)
+    return [(entry.get('title', ''), entry.get('link', ''), entry.get('summary', ''))
+            for entry in getattr(feed, 'entries', [])]
+
+
+def parse_feed_bytes(body: bytes, source: str, keywords: List[str], content_type: Optional[str] = None) -> List[Dict]:
+    """Parse an already-downloaded RSS/Atom body and return matching jobs.
+
+    `content_type` is the response's Content-Type header, if known; it is only
+    used by the feedparser fallback.
+    """
     try:
-        feed = feedparser.parse(feed_url)
-        results = []
-        for entry in getattr(feed, 'entries', []):
-            title = entry.get('title', '')
-            link = entry.get('link', '')
-            summary = entry.get('summary', '')
-            combined = f"{title} {summary}"
-            matches = keywords_match(combined, keywords)
-            if matches:
-                results.append({
-                    'id': make_id(link or title),
-                    'title': title,
-                    'link': link,
-                    'description': summary,
-                    'source': feed_url,
-                    'matches': matches,
-                })
-        return results
+        entries = _lxml_entries(body)
+    except etree.XMLSyntaxError:
+        entries = _feedparser_entries(body, content_type)
+    results = []
+    # Match the whole feed in one batch rather than entry by entry
+    all_matches = scan_many([f"{title} {summary}" for title, _, summary in entries], keywords)
+    for (title, link, summary), matches in zip(entries, all_matches):
+        if matches:
+            results.append({
+                'id': make_id(link or title),
+                'title': title,
+                'link': link,
+                'description': summary,
+                'source': source,
+                'matches': matches,
+            })
+    return results
+
+
+def fetch_rss_feed(feed_url: str, keywords: List[str], cache: Optional[Dict] = None) -> List[Dict]:
+    """Download a single feed over the shared session and parse it.
+
+    Pass a dict from _load_feed_cache() as `cache` to send conditional
+    request headers and reuse the previous results on 304 Not Modified.
+    """
+    try:
+        entry = _cached_feed(cache, feed_url, keywords)
+        r = _get_session().get(feed_url, headers=_conditional_headers(entry), timeout=15)
+        cached = _not_modified_results(cache, feed_url, keywords, r.status_code)
+        if cached is not None:
+            return cached
+        r.raise_for_status()
+        return _parse_and_cache(cache, feed_url, keywords, r.headers, r.content)
     except Exception as e:
         print(f"RSS fetch error for {feed_url}: {e}")
         return []
 
 
 def fetch_indeed_rss(keywords: List[str]) -> List[Dict]:
-    # Construct a simple indeed rss query (this may require adjusting the domain per country)
-    q = "+".join([k.replace(' ', '+') for k in keywords if ' ' not in k])
-    # We'll search for 'python django' as the primary phrase; Indeed's query format may vary by region
-    feed_url = f"https://www.indeed.com/rss?q=python+django"
-    return fetch_rss_feed(feed_url, keywords)
+    # Indeed's query format may vary by region; adjust _INDEED_FEED if needed
+    return fetch_rss_feed(_INDEED_FEED, keywords)
 
 
-def fetch_custom_feeds(feeds: List[str], keywords: List[str]) -> List[Dict]:
+async def fetch_custom_feeds_async(feeds: List[str], keywords: List[str], cache: Optional[Dict] = None) -> List[Dict]:
+    """Download all feeds concurrently and parse each body with parse_feed_bytes().
+
+    Feeds are fetched over one shared aiohttp session; at most FEED_CONCURRENCY
+    requests are in flight at a time so we stay polite to the feed hosts.
+    `cache` works the same way as in fetch_rss_feed().
+    """
+    import aiohttp
+
+    semaphore = asyncio.Semaphore(FEED_CONCURRENCY)
+
+    async def fetch_one(session: aiohttp.ClientSession, feed_url: str) -> List[Dict]:
+        try:
+            entry = _cached_feed(cache, feed_url, keywords)
+            async with semaphore:
+                async with session.get(feed_url, headers=_conditional_headers(entry)) as r:
+                    cached = _not_modified_results(cache, feed_url, keywords, r.status)
+                    if cached is not None:
+                        return cached
+                    r.raise_for_status()
+                    body = await r.read()
+                    headers = r.headers
+            # Parsing works on the downloaded bytes, so no parser does its own blocking fetch
+            return _parse_and_cache(cache, feed_url, keywords, headers, body)
+        except Exception as e:
+            print(f"RSS fetch error for {feed_url}: {e}")
+            return []
+
+    headers = {"User-Agent": USER_AGENT}
+    timeout = aiohttp.ClientTimeout(total=15)
+    async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
+        per_feed = await asyncio.gather(*[fetch_one(session, f) for f in feeds])
+
+    results = []
+    for jobs in per_feed:
+        results.extend(jobs)
+    return results
+
+
+def fetch_custom_feeds_threaded(feeds: List[str], keywords: List[str], cache: Optional[Dict] = None) -> List[Dict]:
+    """Thread-pool alternative to fetch_custom_feeds_async().
+
+    Each feed goes through the blocking fetch_rss_feed(); socket reads release
+    the GIL, so the downloads still overlap.
+    """
     results = []
-    for f in feeds:
-        results.extend(fetch_rss_feed(f, keywords))
+    with ThreadPoolExecutor(max_workers=FEED_CONCURRENCY) as ex:
+        for jobs in ex.map(lambda f: fetch_rss_feed(f, keywords, cache), feeds):
+            results.extend(jobs)
+    return results
+
+
+def fetch_custom_feeds(feeds: List[str], keywords: List[str]) -> List[Dict]:
+    cache = _load_feed_cache()
+    if FEED_FETCH_MODE == "threads":
+        results = fetch_custom_feeds_threaded(feeds, keywords, cache)
+    else:
+        results = asyncio.run(fetch_custom_feeds_async(feeds, keywords, cache))
+    _save_feed_cache(cache)
     return results
 
 
 # -------------------- Notification helpers --------------------
 
+def _chunk_message(text: str, limit: int = TELEGRAM_MAX_CHARS) -> List[str]:
+    """Split text on blank lines into pieces of at most `limit` characters."""
+    chunks = []
+    buf = ""
+    for part in text.split("\n\n"):
+        # A single oversized job entry is hard-split so nothing gets rejected
+        while len(part) > limit:
+            if buf:
+                chunks.append(buf)
+                buf = ""
+            chunks.append(part[:limit])
+            part = part[limit:]
+        if buf and len(buf) + 2 + len(part) > limit:
+            chunks.append(buf)
+            buf = part
+        else:
+            buf = f"{buf}\n\n{part}" if buf else part
+    if buf:
+        chunks.append(buf)
+    return chunks
+
+
+async def _send_telegram_chunks(url: str, chat_id: str, chunks: List[str]) -> bool:
+    """Send one chat's chunks in order over a single session.
+
+    A 429 response is retried after the `retry_after` Telegram asks for; any
+    other failure stops the send so later pieces don't arrive out of order.
+    """
+    import aiohttp
+
+    timeout = aiohttp.ClientTimeout(total=10)
+    sent = 0
+    try:
+        async with aiohttp.ClientSession(headers={"User-Agent": USER_AGENT}, timeout=timeout) as session:
+            for chunk in chunks:
+                if sent:
+                    await asyncio.sleep(TELEGRAM_SEND_INTERVAL)
+                payload = {"chat_id": chat_id, "text": chunk, "parse_mode": "HTML"}
+                for attempt in range(TELEGRAM_MAX_RETRIES + 1):
+                    async with session.post(url, json=payload) as r:
+                        if r.status != 429 or attempt == TELEGRAM_MAX_RETRIES:
+                            r.raise_for_status()
+                            break
+                        data = await r.json(content_type=None)
+                        retry_after = (data.get('parameters') or {}).get('retry_after', 1)
+                    await asyncio.sleep(retry_after)
+                sent += 1
+    except Exception as e:
+        print(f"Telegram notify failed after {sent}/{len(chunks)} message(s): {e}")
+        return False
+    return True
+
+
 def notify_telegram(bot_token: str, chat_id: str, text: str) -> bool:
+    """Send text to Telegram, split into several messages if it is too long."""
     if not bot_token or not chat_id:
         return False
     url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-    payload = {"chat_id": chat_id, "text": text, "parse_mode": "HTML"}
     try:
-        r = requests.post(url, json=payload, timeout=10)
-        r.raise_for_status()
-        return True
+        return asyncio.run(_send_telegram_chunks(url, chat_id, _chunk_message(text)))
     except Exception as e:
         print(f"Telegram notify failed: {e}")
         return False
 
 
-def notify_email(smtp_host: str, smtp_port: int, user: str, password: str, frm: str, to: str, subject: str, body: str) -> bool:
+def notify_email_batch(smtp_host: str, smtp_port: int, user: str, password: str, frm: str, to: str, messages: List[Tuple[str, str]]) -> bool:
+    """Send several (subject, body) emails over a single SMTP session."""
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.header import Header
+
+    s = None
     try:
-        msg = MIMEText(body, "html", "utf-8")
-        msg['Subject'] = Header(subject, 'utf-8')
-        msg['From'] = frm
-        msg['To'] = to
         s = smtplib.SMTP(smtp_host, smtp_port, timeout=15)
         s.starttls()
         s.login(user, password)
-        s.sendmail(frm, [to], msg.as_string())
-        s.quit()
+        for subject, body in messages:
+            msg = MIMEText(body, "html", "utf-8")
+            msg['Subject'] = Header(subject, 'utf-8')
+            msg['From'] = frm
+            msg['To'] = to
+            s.sendmail(frm, [to], msg.as_string())
         return True
     except Exception as e:
         print(f"Email notify failed: {e}")
         return False
+    finally:
+        if s is not None:
+            try:
+                s.quit()
+            except (smtplib.SMTPException, OSError):
+                s.close()
+
+
+def notify_email(smtp_host: str, smtp_port: int, user: str, password: str, frm: str, to: str, subject: str, body: str) -> bool:
+    return notify_email_batch(smtp_host, smtp_port, user, password, frm, to, [(subject, body)])
 
 
 # -------------------- Main agent --------------------
@@ -216,7 +632,8 @@ def notify_email(smtp_host: str, smtp_port: int, user: str, password: str, frm:
 def run_once():
     """Run a single pass: fetch jobs from enabled sources, collect matches, and notify."""
     conn = None  # DB disabled
-    found_new = []
+    # Keyed by job id so the same posting cross-posted on several feeds is only sent once
+    seen = {}
 
     # 1) RemoteOK
     if SOURCES.get('remoteok'):
@@ -225,7 +642,7 @@ def run_once():
         for j in jobs:
             # DB disabled — treating as new
             mark_seen(conn, j['id'], j['title'], j['link'], j['source'])
-            found_new.append(j)
+            seen.setdefault(j['id'], j)
 
     # 2) Indeed RSS
     if SOURCES.get('indeed_rss'):
@@ -234,7 +651,7 @@ def run_once():
         for j in jobs:
             # DB disabled — treating as new
             mark_seen(conn, j['id'], j['title'], j['link'], j['source'])
-            found_new.append(j)
+            seen.setdefault(j['id'], j)
 
     # 3) Custom feeds
     if CUSTOM_FEEDS:
@@ -243,24 +660,28 @@ def run_once():
         for j in jobs:
             # DB disabled — treating as new
             mark_seen(conn, j['id'], j['title'], j['link'], j['source'])
-            found_new.append(j)
+            seen.setdefault(j['id'], j)
 
     # Summary and notifications
+    found_new = list(seen.values())
     if not found_new:
         print("No new matching jobs found.")
         return
 
     print(f"Found {len(found_new)} new matching jobs")
-    # Build message
-    lines = []
+    # Build the email and Telegram messages in a single pass over the jobs
+    html_parts = []
+    text_parts = []
     for j in found_new:
-        lines.append(f"<b>{j['title']}</b>\nMatches: {', '.join(j.get('matches', []))}\n{j['link']}")
-    body = "<br><br>".join(lines)
+        matches = ', '.join(j.get('matches', []))
+        html_parts.append(f"<b>{j['title']}</b>\nMatches: {matches}\n{j['link']}")
+        text_parts.append(f"{j['title']} - {j['link']}\nMatches: {matches}")
+    body = "<br><br>".join(html_parts)
     subject = f"{len(found_new)} New Job(s) Matching Your Keywords"
 
     sent = False
     if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
-        text = "\n\n".join([f"{j['title']} - {j['link']}\nMatches: {', '.join(j.get('matches', []))}" for j in found_new])
+        text = "\n\n".join(text_parts)
         sent = notify_telegram(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, text)
         if sent:
             print("Notified via Telegram")
@@ -285,11 +706,80 @@ def _run_basic_tests():
     # Test keywords_match
     assert keywords_match("Senior Python Django developer", ["python", "django"]) != []
     assert keywords_match("No match here", ["python"]) == []
+    assert keywords_match("xyz", ["XYZ"]) == ["XYZ"]
+    assert keywords_match("abc", [""]) == [""]
+    assert keywords_match("abc", ["", "x"]) == [""]
+    # A keyword contained in a longer one is still reported
+    assert keywords_match("python developer", ["python developer", "python"], 2) == ["python developer", "python"]
+    assert scan_many(["Remote Django role", "No match here"], KEYWORDS) == [["django"], []]
+    # The optional Hyperscan path must report exactly what keywords_match does
+    texts = ["Senior Python Developer", "FastAPI / python, freelance", "", "No match here"]
+    kws = ["python developer", "python", "FastAPI", "FREELANCE"]
+    for n in (1, 2):
+        assert scan_many(texts, kws, n) == [keywords_match(t, kws, n) for t in texts]
+    # ...including from several threads at once, as the thread-pool fetcher does
+    batch = ["Senior Python Developer " * 20] * 200
+    expected = [keywords_match(t, KEYWORDS) for t in batch]
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        assert all(r == expected for r in ex.map(lambda _: scan_many(batch, KEYWORDS), range(32)))
 
     # Test make_id determinism
     a = make_id("https://example.com/job/1")
     b = make_id("https://example.com/job/1")
     assert a == b
+    assert len(a) == 16
+
+    # Feed parsing works on in-memory bytes (no network)
+    rss = (b'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+           b'<item><title>Python Developer</title><link>https://example.com/job/2</link>'
+           b'<description>Remote</description></item>'
+           b'<item><title>Java Developer</title><link>https://example.com/job/3</link></item>'
+           b'</channel></rss>')
+    jobs = parse_feed_bytes(rss, "test", KEYWORDS)
+    assert [j['link'] for j in jobs] == ["https://example.com/job/2"]
+
+    # Atom xhtml text and RSS content:encoded are read like feedparser does
+    atom = (b'<feed xmlns="http://www.w3.org/2005/Atom"><entry>'
+            b'<title type="xhtml"><div xmlns="http://www.w3.org/1999/xhtml">Django <b>Lead</b></div></title>'
+            b'<link href="https://example.com/job/4"/>'
+            b'<content type="xhtml"><div xmlns="http://www.w3.org/1999/xhtml"><p>fastapi</p></div></content>'
+            b'</entry></feed>')
+    assert _lxml_entries(atom) == [("Django Lead", "https://example.com/job/4", "fastapi")]
+    encoded = (b'<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/"'
+               b' xmlns:atom="http://www.w3.org/2005/Atom" xmlns:media="http://search.yahoo.com/mrss/">'
+               b'<channel><item><title>Backend role</title>'
+               b'<atom:link href="https://example.com/feed"/><link>https://example.com/job/5</link>'
+               b'<media:content url="https://example.com/logo.png"/>'
+               b'<content:encoded><![CDATA[<p>Django role</p>]]></content:encoded>'
+               b'</item></channel></rss>')
+    assert _lxml_entries(encoded) == [("Backend role", "https://example.com/job/5", "<p>Django role</p>")]
+    assert [j['matches'] for j in parse_feed_bytes(encoded, "test", KEYWORDS)] == [["django"]]
+    # Internal DTD entities are expanded; external ones are never fetched
+    dtd = (b'<?xml version="1.0"?><!DOCTYPE rss [<!ENTITY x "Python">]><rss version="2.0">'
+           b'<channel><item><title>&x; dev</title><link>https://example.com/job/6</link>'
+           b'</item></channel></rss>')
+    assert _lxml_entries(dtd) == [("Python dev", "https://example.com/job/6", "")]
+    xxe = dtd.replace(b']>', b'<!ENTITY ext SYSTEM "file:///etc/passwd">]>', 1)
+    xxe = xxe.replace(b'</link>', b'</link><description>&ext;</description>', 1)
+    xxe_jobs = parse_feed_bytes(xxe, "test", KEYWORDS)
+    assert [j['title'] for j in xxe_jobs] == ["Python dev"] and 'root:' not in xxe_jobs[0]['description']
+
+    # Feed cache: validators are stored, replayed, and reused on 304 / same body
+    cache = {}
+    first = _parse_and_cache(cache, "test", KEYWORDS, {'ETag': '"v1"'}, rss)
+    assert first == jobs
+    assert _conditional_headers(_cached_feed(cache, "test", KEYWORDS)) == {'If-None-Match': '"v1"'}
+    assert _not_modified_results(cache, "test", KEYWORDS, 304) == jobs
+    assert _not_modified_results(cache, "test", KEYWORDS, 200) is None
+    cache["test"]['results'] = ["sentinel"]
+    assert _parse_and_cache(cache, "test", KEYWORDS, {}, rss) == ["sentinel"]
+    assert _cached_feed(cache, "test", ["java"]) is None
+    cache["test"]['min_match'] = MIN_KEYWORD_MATCH + 1
+    assert _not_modified_results(cache, "test", KEYWORDS, 304) is None
+
+    # Telegram chunking keeps every piece under the limit and loses nothing
+    chunks = _chunk_message("a" * 5 + "\n\n" + "b" * 5 + "\n\n" + "c" * 25, limit=12)
+    assert chunks == ["aaaaa\n\nbbbbb", "c" * 12, "c" * 12, "c"]
 
     # mark_seen and seen_contains are no-ops / deterministic when DB disabled
     assert seen_contains(None, "someid") is False